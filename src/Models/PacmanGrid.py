@@ -11,6 +11,8 @@ as well as to a text that can be passed to the user's clipboard
 from argparse import ArgumentError
 
 #!-------------------------------------
+import re
+
 import numpy as np;
 
 
@@ -37,6 +39,16 @@ class PacmanGrid:
             '#FFFFFF': 'FFFF',  # Normal PowerUps are  now white!
             '#FE9900': 'F5A0'   # Eat Others PowerUps is now yellow!
         }
+        #? Labels used by __str__ for the entity words of each color
+        self.internalEntityLabels: dict[str, str] = {
+            "#FFDE59": "pacmanEntityArray",
+            "#E4080A": "redGhostOriginalLocation",
+            "#5DE2E7": "cyanGhostOriginalLocation",
+            "#EFC3CA": "pinkGhostOriginalLocation",
+            "#7DDA58": "greenGhostOriginalLocation",
+            "#FFFFFF": "normalPowerUpsLocations",
+            "#FE9900": "eatOthersPowerUpsLocations"
+        }
         self.hardcodedLocationGrid = np.full((16, 16), "",
                                                dtype='U3')
         #? Lets now define the count grid such that we can store the information of each cell's visits
@@ -74,7 +86,6 @@ class PacmanGrid:
                     initial_location[1] = hex(row)[2:].upper()
                     initial_location[2] = hex(column)[2:].upper()
                     self.hardcodedLocationGrid[row][column] = ''.join(initial_location)
-        print(self.hardcodedLocationGrid)
     def setValueOnGridCell(self, gridX: int, gridY: int, color: str) -> bool:
         """
         This method allows the upper level view to add a value into a single cell, the idea of this method is to be called
@@ -246,8 +257,180 @@ class PacmanGrid:
         serializable_result += "\n" + "\n".join(initialVisitsValueForCells)
 
         return serializable_result
-    
-    
+
+    def loadFromSerializedString(self, serializedGrid: str) -> bool:
+        """
+        This method is the inverse of __str__, it allows us to read back a grid that was previously exported to a file or to
+        the clipboard. The color array holds every cell of the grid (entities included), so it is enough to rebuild the
+        internal grid and the entity counts, if the movement list is present it is also restored.
+        :param serializedGrid: Text produced by the __str__ method of this class
+        :return: bool flag indicating success or failure in the operation
+        """
+        #! 1. Locating the start of the color array, this is the only labeled line we need
+        serializedLines: list[str] = [line.strip() for line in serializedGrid.splitlines()]
+        colorArrayStart: int = next((index for index, line in enumerate(serializedLines)
+                                     if line.startswith("colorLocationArrayForRow,")), -1)
+        if colorArrayStart < 0 or len(serializedLines) < colorArrayStart + 256:
+            return False
+        knownColorValues: set[str] = set(self.internalColorDefinitions.values()) | {"000"}
+        colorValues: list[str] = []
+        for line in serializedLines[colorArrayStart:colorArrayStart + 256]:
+            value: str = line.split("HEX")[-1].strip().upper()
+            if "HEX" not in line or value not in knownColorValues:
+                return False
+            colorValues.append(value)
+
+        #! 2. Validating the movement list if the file contains one, nothing is changed until the whole input is valid
+        movementLines: list[str] = serializedLines[colorArrayStart + 256:colorArrayStart + 356]
+        movementValues: list[int] | None = None
+        if len(movementLines) == 100 and all("DEC" in line for line in movementLines):
+            movementTexts: list[str] = [line.split("DEC")[-1].strip() for line in movementLines]
+            if not all(text.isdigit() and 1 <= int(text) <= 4 for text in movementTexts):
+                return False
+            movementValues = [int(text) for text in movementTexts]
+
+        #! 3. Rebuilding the grid, the entity counts and the movement list
+        self.internalGridForUserInformation = np.array(colorValues, dtype='U4').reshape((16, 16))
+        self.recountEntitiesFromGrid()
+        if movementValues is not None:
+            self.setMovementValues(movementValues)
+        return True
+
+    def recountEntitiesFromGrid(self) -> None:
+        """
+        This method recomputes the pacman and ghost counts from the internal grid, it is used whenever the grid is
+        rebuilt at once instead of cell by cell through setValueOnGridCell.
+        """
+        self.pacmanCount = int(np.count_nonzero(
+            self.internalGridForUserInformation == self.internalColorDefinitions.get("#FFDE59")))
+        for ghostType, color in zip(self.ghostCount.keys(), ["#E4080A", "#5DE2E7", "#EFC3CA", "#7DDA58"]):
+            self.ghostCount[ghostType] = int(np.count_nonzero(
+                self.internalGridForUserInformation == self.internalColorDefinitions.get(color)))
+
+    def getMovementValues(self) -> np.ndarray:
+        return np.array([int(value.split("DEC")[-1]) for value in self.hardCodedMovementList], dtype=int)
+
+    def setMovementValues(self, movementValues: list[int]) -> None:
+        self.hardCodedMovementList = [f"DEC {value}" for value in movementValues]
+        self.hardCodedMovementList[0] = self.hardCodedMovementList[0].replace("DEC ", "movementListValues, DEC ")
+        self.hardCodedMovementList[1:] = [value.replace("DEC ", " "*20 + "DEC ") for value in self.hardCodedMovementList[1:]]
+
+    def getEntityLocationWords(self) -> dict[str, str]:
+        """
+        This method returns the entity words exported by __str__ keyed by their label, power ups are keyed by their label
+        and their position within the list (in row major order, just like __str__ writes them).
+        :return: Dictionary mapping each entity label to the display address it holds
+        """
+        entityWords: dict[str, str] = {}
+        for color, label in self.internalEntityLabels.items():
+            locations: np.ndarray = self.hardcodedLocationGrid[
+                self.internalGridForUserInformation == self.internalColorDefinitions.get(color)]
+            if color in ("#FFFFFF", "#FE9900"):
+                entityWords.update({f"{label}[{index}]": str(location) for index, location in enumerate(locations)})
+            elif len(locations) > 0:
+                entityWords[label] = str(locations[0])
+        return entityWords
+
+    def getEntityLayout(self) -> dict[str, int]:
+        """
+        This method counts the cells of each entity color, keyed by the label __str__ uses for them. The entity words form
+        a variable length block before the color array, so two revisions only share the same memory layout when these
+        counts match.
+        :return: Dictionary mapping each entity label to the amount of words it holds
+        """
+        return {label: int(np.count_nonzero(
+                    self.internalGridForUserInformation == self.internalColorDefinitions.get(color)))
+                for color, label in self.internalEntityLabels.items()}
+
+    def computeDeltaPatch(self, previousGrid: 'PacmanGrid', includeMovementWords: bool = True) -> str:
+        """
+        This method compares this grid against a previous revision and serializes only the data words that changed, such
+        that iterating on a small part of a level does not require exporting the whole program again. Both revisions must
+        hold the same amount of each entity, otherwise the words of the previous export sit at different addresses and a
+        full export is needed. Each line of the patch has the form "label[key], HEX value" (or DEC), where the address of
+        the word is the address of the label plus the offset given by the key:
+        1) Entity words use their label directly, power ups add their index in the list.
+        2) colorLocationArrayForRow is keyed by the display address of the cell, the offset is that address minus F00.
+        3) movementListValues is keyed by the index of the movement.
+        :param previousGrid: Grid holding the previous revision of the level
+        :param includeMovementWords: Whether the movement list is compared, grids whose movement list was generated
+        randomly instead of read from a file should leave it out
+        :return: A string with one changed word per line, empty if both revisions hold the same data
+        :raises ValueError: If the entity counts of both revisions differ
+        """
+        #! 1. Both revisions must share the same data layout
+        previousEntityLayout: dict[str, int] = previousGrid.getEntityLayout()
+        currentEntityLayout: dict[str, int] = self.getEntityLayout()
+        if previousEntityLayout != currentEntityLayout:
+            changedLabels: list[str] = [
+                f"{label} {previousEntityLayout.get(label, 0)} -> {currentEntityLayout.get(label, 0)}"
+                for label in sorted(previousEntityLayout.keys() | currentEntityLayout.keys())
+                if previousEntityLayout.get(label, 0) != currentEntityLayout.get(label, 0)]
+            raise ValueError(f"The entity counts changed ({', '.join(changedLabels)}), a full export is needed")
+
+        #! 2. Entity words, compared by label
+        patchLines: list[str] = []
+        previousEntityWords: dict[str, str] = previousGrid.getEntityLocationWords()
+        currentEntityWords: dict[str, str] = self.getEntityLocationWords()
+        for label, location in currentEntityWords.items():
+            if previousEntityWords.get(label) != location:
+                patchLines.append(f"{label}, HEX {location}")
+
+        #! 3. Color words, compared at once for the whole grid
+        for index in np.flatnonzero(previousGrid.internalGridForUserInformation != self.internalGridForUserInformation):
+            patchLines.append(f"colorLocationArrayForRow[{self.hardcodedLocationGrid.flat[index]}], "
+                              f"HEX {self.internalGridForUserInformation.flat[index]}")
+
+        #! 4. Movement words
+        if includeMovementWords:
+            currentMovementValues: np.ndarray = self.getMovementValues()
+            for index in np.flatnonzero(previousGrid.getMovementValues() != currentMovementValues):
+                patchLines.append(f"movementListValues[{index}], DEC {currentMovementValues[index]}")
+        return "\n".join(patchLines)
+
+    def applyDeltaPatch(self, deltaPatch: str) -> bool:
+        """
+        This method applies a patch produced by computeDeltaPatch onto this grid. Entity words are accepted but not
+        applied since the entities are derived from the color words, which are always part of the same patch. The patch
+        is validated as a whole before any change is made, and it is rejected if it changes the entity counts.
+        :param deltaPatch: Text produced by computeDeltaPatch
+        :return: bool flag indicating success or failure in the operation
+        """
+        updatedGrid: np.ndarray = self.internalGridForUserInformation.copy()
+        updatedMovementValues: np.ndarray = self.getMovementValues()
+        knownColorValues: set[str] = set(self.internalColorDefinitions.values()) | {"000"}
+        entityLabelPattern: re.Pattern = re.compile(r"(pacmanEntityArray|(red|cyan|pink|green)GhostOriginalLocation|"
+                                                    r"(normal|eatOthers)PowerUpsLocations\[\d+\])")
+        for line in filter(None, (line.strip() for line in deltaPatch.splitlines())):
+            match = re.fullmatch(r"(\w+)(\[(\w+)\])?,\s*(HEX|DEC)\s+(\w+)", line)
+            if match is None:
+                return False
+            label, key, wordType, value = match.group(1), match.group(3), match.group(4), match.group(5).upper()
+            if label == "colorLocationArrayForRow":
+                cellIndexes: np.ndarray = np.flatnonzero(self.hardcodedLocationGrid == key)
+                if len(cellIndexes) != 1 or wordType != "HEX" or value not in knownColorValues:
+                    return False
+                updatedGrid.flat[cellIndexes[0]] = value
+            elif label == "movementListValues":
+                if key is None or not key.isdigit() or int(key) >= len(updatedMovementValues) \
+                        or wordType != "DEC" or not value.isdigit() or not 1 <= int(value) <= 4:
+                    return False
+                updatedMovementValues[int(key)] = int(value)
+            elif entityLabelPattern.fullmatch(label + (f"[{key}]" if key is not None else "")) is None:
+                return False
+
+        #! The entity block must keep its layout, otherwise the patch does not match the previous export
+        previousEntityLayout: dict[str, int] = self.getEntityLayout()
+        originalGrid: np.ndarray = self.internalGridForUserInformation
+        self.internalGridForUserInformation = updatedGrid
+        if self.getEntityLayout() != previousEntityLayout:
+            self.internalGridForUserInformation = originalGrid
+            return False
+        self.setMovementValues(updatedMovementValues.tolist())
+        self.recountEntitiesFromGrid()
+        return True
+
+
     def get_pacman_count(self) -> int:
         return self.pacmanCount;
     def get_ghost_count(self, ghostType: str) -> int:
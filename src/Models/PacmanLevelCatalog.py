@@ -0,0 +1,285 @@
+#!------------------------------------
+"""
+@Description: The following file contains the level catalog for the GridCreation tool. Exported levels end up as loose
+.txt files, so this class keeps an embedded SQLite store that indexes them. Each grid is hashed by its content to detect
+duplicates, and its metadata (entity positions, power up counts, wall density and reachability from pacman) is stored in
+indexed columns such that both the editor and the command line can query the catalog quickly. Re-indexing a folder only
+parses the files whose size or modification time changed since the last run.
+"""
+#!-------------------------------------
+import hashlib
+import os
+import re
+import sqlite3
+from collections import deque
+
+import numpy as np
+
+from Models.PacmanGrid import PacmanGrid
+
+
+DEFAULT_CATALOG_LOCATION: str = os.path.join(os.path.expanduser('~'), ".pacmanWorldCatalog.sqlite3")
+
+
+class PacmanLevelCatalog:
+    #? Entity colors mapped to the column prefix used in the catalog, the names follow the labels used in PacmanGrid.__str__
+    entityColumnPrefixes: dict[str, str] = {
+        '#FFDE59': 'pacman',
+        '#E4080A': 'redGhost',
+        '#5DE2E7': 'cyanGhost',
+        '#EFC3CA': 'pinkGhost',
+        '#7DDA58': 'greenGhost'
+    }
+    #? Every metadata column that can be used to filter the catalog, all of them get their own index
+    metadataColumns: list[str] = [f"{prefix}{axis}" for prefix in entityColumnPrefixes.values()
+                                  for axis in ("Row", "Column")] + [
+        'normalPowerUpCount',
+        'eatOthersPowerUpCount',
+        'wallCount',
+        'wallDensity',
+        'reachableCellCount',
+        'reachablePowerUpCount',
+        'allPowerUpsReachable'
+    ]
+    queryOperators: list[str] = ['>=', '<=', '!=', '=', '>', '<']
+
+    def __init__(self, catalogLocation: str = DEFAULT_CATALOG_LOCATION):
+        #? Defining internal parameters, the grid instance is reused for every parsed file
+        self.catalogLocation: str = catalogLocation
+        self.internalGridForParsing: PacmanGrid = PacmanGrid()
+        self.internalConnection: sqlite3.Connection = sqlite3.connect(catalogLocation)
+        self.internalConnection.row_factory = sqlite3.Row
+        self.initCatalogTables()
+
+    def initCatalogTables(self) -> None:
+        """
+        This method creates the catalog tables if they do not exist yet. Levels are stored once per content hash, while
+        the files table maps every indexed file to its level, this is what lets us find duplicates with a single query.
+        """
+        metadataDefinitions: str = ", ".join(
+            f"{column} REAL" if column == 'wallDensity' else f"{column} INTEGER" for column in self.metadataColumns)
+        with self.internalConnection:
+            self.internalConnection.execute(
+                f"CREATE TABLE IF NOT EXISTS levels (gridHash TEXT PRIMARY KEY, {metadataDefinitions})")
+            self.internalConnection.execute(
+                "CREATE TABLE IF NOT EXISTS levelFiles (filePath TEXT PRIMARY KEY, gridHash TEXT NOT NULL, "
+                "modifiedTime REAL NOT NULL, fileSize INTEGER NOT NULL)")
+            self.internalConnection.execute(
+                "CREATE INDEX IF NOT EXISTS index_levelFiles_gridHash ON levelFiles (gridHash)")
+            #? Files that could not be parsed are remembered too, such that they are only read again once they change
+            self.internalConnection.execute(
+                "CREATE TABLE IF NOT EXISTS failedFiles (filePath TEXT PRIMARY KEY, "
+                "modifiedTime REAL NOT NULL, fileSize INTEGER NOT NULL)")
+            for column in self.metadataColumns:
+                self.internalConnection.execute(
+                    f"CREATE INDEX IF NOT EXISTS index_levels_{column} ON levels ({column})")
+
+    def close(self) -> None:
+        self.internalConnection.close()
+
+    def computeGridHash(self, grid: PacmanGrid) -> str:
+        """
+        This method hashes the content of the grid, only the color grid is used since the movement list is random and
+        would make two identical maps look different.
+        :param grid: Grid to be hashed
+        :return: Hexadecimal SHA-256 digest of the grid content
+        """
+        return hashlib.sha256(np.ascontiguousarray(grid.internalGridForUserInformation).tobytes()).hexdigest()
+
+    def computeGridMetadata(self, grid: PacmanGrid) -> dict[str, int | float | None]:
+        """
+        This method precomputes the metadata stored in the catalog for a single grid. Reachability is measured with a
+        breadth first search from pacman over every cell that is not a wall, moving up, down, left and right.
+        :param grid: Grid from which the metadata is computed
+        :return: Dictionary mapping each metadata column to its value
+        """
+        cells: np.ndarray = grid.internalGridForUserInformation
+        metadata: dict[str, int | float | None] = {}
+        #! 1. Entity positions, None when the entity was not placed
+        for color, prefix in self.entityColumnPrefixes.items():
+            positions: np.ndarray = np.argwhere(cells == grid.internalColorDefinitions.get(color))
+            metadata[f"{prefix}Row"] = int(positions[0][0]) if len(positions) > 0 else None
+            metadata[f"{prefix}Column"] = int(positions[0][1]) if len(positions) > 0 else None
+
+        #! 2. Power up and wall counts
+        wallCells: np.ndarray = cells == grid.internalColorDefinitions.get('#00001F')
+        powerUpCells: np.ndarray = ((cells == grid.internalColorDefinitions.get('#FFFFFF')) |
+                                    (cells == grid.internalColorDefinitions.get('#FE9900')))
+        metadata['normalPowerUpCount'] = int(np.count_nonzero(cells == grid.internalColorDefinitions.get('#FFFFFF')))
+        metadata['eatOthersPowerUpCount'] = int(np.count_nonzero(cells == grid.internalColorDefinitions.get('#FE9900')))
+        metadata['wallCount'] = int(np.count_nonzero(wallCells))
+        metadata['wallDensity'] = metadata['wallCount'] / cells.size
+
+        #! 3. Reachability from pacman
+        reachableCells: np.ndarray = np.zeros(cells.shape, dtype=bool)
+        if metadata['pacmanRow'] is not None:
+            pendingCells: deque[tuple[int, int]] = deque([(metadata['pacmanRow'], metadata['pacmanColumn'])])
+            reachableCells[metadata['pacmanRow']][metadata['pacmanColumn']] = True
+            while pendingCells:
+                row, column = pendingCells.popleft()
+                for nextRow, nextColumn in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)):
+                    if (0 <= nextRow < 16 and 0 <= nextColumn < 16 and not wallCells[nextRow][nextColumn]
+                            and not reachableCells[nextRow][nextColumn]):
+                        reachableCells[nextRow][nextColumn] = True
+                        pendingCells.append((nextRow, nextColumn))
+        metadata['reachableCellCount'] = int(np.count_nonzero(reachableCells))
+        metadata['reachablePowerUpCount'] = int(np.count_nonzero(reachableCells & powerUpCells))
+        metadata['allPowerUpsReachable'] = int(metadata['reachablePowerUpCount'] == np.count_nonzero(powerUpCells))
+        return metadata
+
+    def indexGrid(self, grid: PacmanGrid, filePath: str) -> str:
+        """
+        This method stores a single grid in the catalog and links it to the file it was exported to. If a level with the
+        same content already exists only the file link is added.
+        :param grid: Grid to be indexed
+        :param filePath: File the grid was read from or exported to
+        :return: Content hash of the indexed grid
+        """
+        gridHash: str = self.computeGridHash(grid)
+        filePath = os.path.abspath(filePath)
+        fileStatistics: os.stat_result = os.stat(filePath)
+        metadata: dict[str, int | float | None] = self.computeGridMetadata(grid)
+        with self.internalConnection:
+            self.internalConnection.execute(
+                f"INSERT OR IGNORE INTO levels (gridHash, {', '.join(self.metadataColumns)}) "
+                f"VALUES (?, {', '.join('?' for _ in self.metadataColumns)})",
+                [gridHash] + [metadata[column] for column in self.metadataColumns])
+            self.internalConnection.execute(
+                "INSERT OR REPLACE INTO levelFiles (filePath, gridHash, modifiedTime, fileSize) VALUES (?, ?, ?, ?)",
+                (filePath, gridHash, fileStatistics.st_mtime, fileStatistics.st_size))
+            self.internalConnection.execute("DELETE FROM failedFiles WHERE filePath = ?", (filePath,))
+            self.removeOrphanLevels()
+        return gridHash
+
+    def indexFile(self, filePath: str) -> bool:
+        """
+        This method parses a previously exported file and indexes it, files that can not be parsed are dropped from the
+        catalog in case they were indexed before and remembered as failed until their size or modification time changes.
+        :param filePath: Path to the exported .txt file
+        :return: bool flag indicating success or failure in the operation
+        """
+        try:
+            with open(filePath, 'r', encoding='utf-8') as fileToRead:
+                serializedGrid: str = fileToRead.read()
+        except (OSError, UnicodeDecodeError):
+            serializedGrid = ""
+        if self.internalGridForParsing.loadFromSerializedString(serializedGrid):
+            try:
+                self.indexGrid(self.internalGridForParsing, filePath)
+                return True
+            except OSError:
+                pass
+        self.removeFile(filePath)
+        try:
+            fileStatistics: os.stat_result = os.stat(filePath)
+        except OSError:
+            return False
+        with self.internalConnection:
+            self.internalConnection.execute(
+                "INSERT OR REPLACE INTO failedFiles (filePath, modifiedTime, fileSize) VALUES (?, ?, ?)",
+                (os.path.abspath(filePath), fileStatistics.st_mtime, fileStatistics.st_size))
+        return False
+
+    def indexDirectory(self, directory: str) -> dict[str, int]:
+        """
+        This method walks a folder looking for exported .txt files and only re-indexes those whose size or modification
+        time changed since the last run, including files that previously failed to parse. Files that were deleted from
+        the folder, or that can no longer be read, are also removed from the catalog.
+        :param directory: Folder to be indexed recursively
+        :return: Dictionary with the amount of indexed, skipped, failed and removed files
+        """
+        directory = os.path.abspath(directory)
+        summary: dict[str, int] = {'indexed': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+        knownFiles: dict[str, sqlite3.Row] = {
+            row['filePath']: row for row in self.internalConnection.execute(
+                "SELECT filePath, modifiedTime, fileSize FROM levelFiles WHERE substr(filePath, 1, ?) = ? UNION ALL "
+                "SELECT filePath, modifiedTime, fileSize FROM failedFiles WHERE substr(filePath, 1, ?) = ?",
+                (len(os.path.join(directory, '')), os.path.join(directory, '')) * 2)}
+        foundFiles: set[str] = set()
+        for currentDirectory, _, fileNames in os.walk(directory):
+            for fileName in fileNames:
+                if not fileName.lower().endswith('.txt'):
+                    continue
+                filePath: str = os.path.join(currentDirectory, fileName)
+                try:
+                    fileStatistics: os.stat_result = os.stat(filePath)
+                except OSError:
+                    #? Dangling links or files deleted during the walk, any previous entry is dropped below
+                    summary['failed'] += 1
+                    continue
+                foundFiles.add(filePath)
+                knownFile: sqlite3.Row | None = knownFiles.get(filePath)
+                if (knownFile is not None and knownFile['modifiedTime'] == fileStatistics.st_mtime
+                        and knownFile['fileSize'] == fileStatistics.st_size):
+                    summary['skipped'] += 1
+                elif self.indexFile(filePath):
+                    summary['indexed'] += 1
+                else:
+                    summary['failed'] += 1
+        for filePath in set(knownFiles.keys()) - foundFiles:
+            self.removeFile(filePath)
+            summary['removed'] += 1
+        return summary
+
+    def removeFile(self, filePath: str) -> None:
+        with self.internalConnection:
+            self.internalConnection.execute("DELETE FROM levelFiles WHERE filePath = ?", (os.path.abspath(filePath),))
+            self.internalConnection.execute("DELETE FROM failedFiles WHERE filePath = ?", (os.path.abspath(filePath),))
+            self.removeOrphanLevels()
+
+    def removeOrphanLevels(self) -> None:
+        self.internalConnection.execute(
+            "DELETE FROM levels WHERE gridHash NOT IN (SELECT DISTINCT gridHash FROM levelFiles)")
+
+    def parseCondition(self, condition: str) -> tuple[str, str, float]:
+        """
+        This method turns a textual condition such as "normalPowerUpCount>20" into the tuple used by queryLevels, it is
+        shared by the command line and the editor.
+        :param condition: Condition written as column, operator and number
+        :return: Tuple holding the column, the operator and the numeric value
+        """
+        match = re.fullmatch(r"\s*(\w+)\s*(" + "|".join(map(re.escape, self.queryOperators)) + r")\s*(-?\d+(\.\d+)?)\s*",
+                             condition)
+        if match is None:
+            raise ValueError(f"Invalid condition '{condition}', expected something like normalPowerUpCount>20")
+        return match.group(1), match.group(2), float(match.group(3))
+
+    def queryLevels(self, conditions: list[tuple[str, str, float]]) -> list[dict]:
+        """
+        This method filters the catalog using the indexed metadata columns, every condition must hold for a level to be
+        returned. Column names and operators are validated against the known ones before building the query.
+        :param conditions: List of (column, operator, value) tuples
+        :return: List of dictionaries with the level metadata and the files holding that level
+        """
+        whereClauses: list[str] = []
+        parameters: list[float] = []
+        for column, operator, value in conditions:
+            if column not in self.metadataColumns:
+                raise ValueError(f"Unknown catalog column '{column}', expected one of {', '.join(self.metadataColumns)}")
+            if operator not in self.queryOperators:
+                raise ValueError(f"Unknown operator '{operator}', expected one of {', '.join(self.queryOperators)}")
+            whereClauses.append(f"levels.{column} {operator} ?")
+            parameters.append(value)
+        query: str = ("SELECT levels.*, GROUP_CONCAT(levelFiles.filePath, '\n') AS filePaths FROM levels "
+                      "JOIN levelFiles ON levelFiles.gridHash = levels.gridHash")
+        if whereClauses:
+            query += " WHERE " + " AND ".join(whereClauses)
+        query += " GROUP BY levels.gridHash ORDER BY levels.gridHash"
+        results: list[dict] = []
+        for row in self.internalConnection.execute(query, parameters):
+            level: dict = dict(row)
+            level['filePaths'] = sorted(level['filePaths'].split('\n'))
+            results.append(level)
+        return results
+
+    def findDuplicateLevels(self) -> dict[str, list[str]]:
+        """
+        This method returns every level that was exported to more than one file.
+        :return: Dictionary mapping each duplicated content hash to the files holding it
+        """
+        duplicates: dict[str, list[str]] = {}
+        for row in self.internalConnection.execute(
+                "SELECT gridHash, filePath FROM levelFiles WHERE gridHash IN "
+                "(SELECT gridHash FROM levelFiles GROUP BY gridHash HAVING COUNT(*) > 1) ORDER BY gridHash, filePath"):
+            duplicates.setdefault(row['gridHash'], []).append(row['filePath'])
+        return duplicates
@@ -14,9 +14,10 @@ intent.
 """
 # !-------------------------------------
 import os
+import sqlite3
 
 from PyQt5.QtCore import QFile, Qt, QRect, QRectF, QEvent
-from PyQt5.QtGui import QTextBlock, QFont, QColor, QPen, QMouseEvent
+from PyQt5.QtGui import QTextBlock, QFont, QColor, QPen, QMouseEvent, QCloseEvent
 from PyQt5.QtWidgets import (
     QMainWindow,
     QRadioButton,
@@ -27,10 +28,11 @@ from PyQt5.QtWidgets import (
     QMenuBar,
     QMenu,
     QAction, QWidget, QApplication, QFileDialog, QMessageBox, QLabel, QHBoxLayout, QGraphicsScene, QGraphicsView,
-    QGraphicsSceneMouseEvent)
+    QGraphicsSceneMouseEvent, QInputDialog)
 from mistune.plugins.table import ALIGN_RIGHT
 
 from Models.PacmanGrid import PacmanGrid
+from Models.PacmanLevelCatalog import PacmanLevelCatalog
 
 
 class PaintingMode:
@@ -73,6 +75,7 @@ class PacmanGridCreationToolView(QMainWindow):
         self.colorButtonGroup: QButtonGroup = QButtonGroup(self)
         self.internallySelectedColor: str = ""
         self.internalPacmanGridInstance: PacmanGrid = PacmanGrid()
+        self.internalLevelCatalog: PacmanLevelCatalog = None;  # ? Opened on the first catalog action or export
         self.menuBarForExportingOptions: QMenuBar = None;
         self.splitterForHorizontalMovement: QSplitter = None;
         self.vBoxForButtonPlacement: QVBoxLayout = None;
@@ -170,8 +173,23 @@ class PacmanGridCreationToolView(QMainWindow):
         menuItemForFileExporting = QAction("Export To TXT File", self)
         menuForExportingOptions.addAction(menuItemForClipboardExporting)
         menuForExportingOptions.addAction(menuItemForFileExporting)
+        menuItemForDeltaExporting = QAction("Export Changes Since TXT File To Clipboard", self)
+        menuForExportingOptions.addAction(menuItemForDeltaExporting)
         menuItemForClipboardExporting.triggered.connect(self.__handle_user_exporting_to_clipboard_event)
         menuItemForFileExporting.triggered.connect(self.__handle_user_exporting_to_file_event)
+        menuItemForDeltaExporting.triggered.connect(self.__handle_user_exporting_delta_to_clipboard_event)
+        # ? 3. A second menu gives access to the level catalog, exported files are indexed there automatically
+        menuForCatalogOptions: QMenu = self.menuBarForExportingOptions.addMenu("Level Catalog Options")
+        menuForCatalogOptions.setStyleSheet(menuForExportingOptions.styleSheet())
+        menuItemForFolderIndexing = QAction("Index Folder Into Catalog", self)
+        menuItemForCatalogQuerying = QAction("Query Catalog", self)
+        menuItemForDuplicateSearching = QAction("Find Duplicate Levels", self)
+        menuForCatalogOptions.addAction(menuItemForFolderIndexing)
+        menuForCatalogOptions.addAction(menuItemForCatalogQuerying)
+        menuForCatalogOptions.addAction(menuItemForDuplicateSearching)
+        menuItemForFolderIndexing.triggered.connect(self.__handle_user_indexing_folder_event)
+        menuItemForCatalogQuerying.triggered.connect(self.__handle_user_querying_catalog_event)
+        menuItemForDuplicateSearching.triggered.connect(self.__handle_user_finding_duplicates_event)
 
     def __handle_user_exporting_to_clipboard_event(self) -> None:
         # ? 1. The first thing we need to do here is access the clipboard
@@ -180,6 +198,35 @@ class PacmanGridCreationToolView(QMainWindow):
         # ? 2. We load now the text that comes from the internal object
         clipboardObjectForExporting.setText(self.internalPacmanGridInstance.__str__())
 
+    def __handle_user_exporting_delta_to_clipboard_event(self) -> None:
+        # ? 1. We ask the user for the file holding the previous revision of the level
+        selectedFileName, _ = QFileDialog.getOpenFileName(self, "Choose the previously exported TXT File...",
+                                                          os.path.expanduser('~'), "Text Files (*.txt)")
+        if len(selectedFileName) == 0:
+            return
+        # ? 2. We read it back into a grid, only files exported by this tool can be compared
+        previousGrid: PacmanGrid = PacmanGrid()
+        fileToReadFrom: QFile = QFile(selectedFileName)
+        if not fileToReadFrom.open(QFile.OpenModeFlag.ReadOnly):
+            QMessageBox.critical(self, "Error", "Could not open file to read from")
+            return
+        serializedGrid: str = bytes(fileToReadFrom.readAll()).decode('utf-8', errors='replace')
+        fileToReadFrom.close()
+        if not previousGrid.loadFromSerializedString(serializedGrid):
+            QMessageBox.critical(self, "Error", "The selected file is not an exported grid layout")
+            return
+        # ? 3. Only the changed words are loaded into the clipboard, the movement list of the editor is drawn at random
+        # ? every time the app starts so it is left out of the comparison
+        try:
+            deltaPatch: str = self.internalPacmanGridInstance.computeDeltaPatch(previousGrid,
+                                                                                includeMovementWords=False)
+        except ValueError as error:
+            QMessageBox.critical(self, "Error", str(error))
+            return
+        QApplication.clipboard().setText(deltaPatch)
+        QMessageBox.information(self, "Changes Exported",
+                                f"{len(deltaPatch.splitlines())} changed words were copied to the clipboard")
+
     def __handle_user_exporting_to_file_event(self) -> None:
         # ? 1. Similarly to JavaFX FileChooser dialog, we need to use a FileDialog here
         fileDialogForUserToDefineWhereToSaveTXT: QFileDialog = QFileDialog(self,
@@ -212,13 +259,75 @@ class PacmanGridCreationToolView(QMainWindow):
                     # ? 2.4 We now need to write the file, we need to write the text to the file
                     fileToWriteTo.write(self.internalPacmanGridInstance.__str__().encode('utf-8'))
                     fileToWriteTo.close()
+                    # ? 2.5 We keep the catalog up to date with every exported level, the file is already written
+                    # ? so a catalog failure only deserves a warning
+                    try:
+                        self.get_level_catalog().indexGrid(self.internalPacmanGridInstance, selectedFileName)
+                    except (sqlite3.Error, OSError) as error:
+                        QMessageBox.warning(self, "Catalog Not Updated",
+                                            f"The file was saved but could not be added to the catalog: {error}")
                 else:
-                    # ? 2.5 If the file could not be opened, we need to show an error message
+                    # ? 2.6 If the file could not be opened, we need to show an error message
                     QMessageBox.critical(self, "Error", "Could not open file to write to")
         elif fileDialogForUserToDefineWhereToSaveTXT.exec() == QFileDialog.DialogCode.Rejected:
             # ? 2.3 If the user cancels the dialog, we need to do nothing
             return
 
+    def __handle_user_indexing_folder_event(self) -> None:
+        # ? 1. We ask the user for the folder holding the exported levels, only changed files are parsed again
+        selectedDirectory: str = QFileDialog.getExistingDirectory(self, "Choose the folder to index...",
+                                                                  os.path.expanduser('~'))
+        if len(selectedDirectory) > 0:
+            try:
+                summary: dict[str, int] = self.get_level_catalog().indexDirectory(selectedDirectory)
+            except (sqlite3.Error, OSError) as error:
+                QMessageBox.critical(self, "Error", f"Could not update the catalog: {error}")
+                return
+            QMessageBox.information(self, "Catalog Updated",
+                                    "\n".join(f"{key.capitalize()} files: {value}" for key, value in summary.items()))
+
+    def __handle_user_querying_catalog_event(self) -> None:
+        # ? 1. Conditions are written just like in the command line, separated by commas
+        conditionsText, accepted = QInputDialog.getText(self, "Query Catalog",
+                                                        "Conditions (e.g. normalPowerUpCount>20, pinkGhostRow=7):")
+        if not accepted:
+            return
+        try:
+            conditions = [self.get_level_catalog().parseCondition(condition)
+                          for condition in conditionsText.split(",") if condition.strip()]
+            levels: list[dict] = self.get_level_catalog().queryLevels(conditions)
+        except (ValueError, sqlite3.Error) as error:
+            QMessageBox.critical(self, "Error", str(error))
+            return
+        # ? 2. We show the files of every matching level
+        matchingFiles: list[str] = [filePath for level in levels for filePath in level['filePaths']]
+        QMessageBox.information(self, "Query Results",
+                                f"{len(levels)} matching levels\n" + "\n".join(matchingFiles))
+
+    def __handle_user_finding_duplicates_event(self) -> None:
+        try:
+            duplicates: dict[str, list[str]] = self.get_level_catalog().findDuplicateLevels()
+        except sqlite3.Error as error:
+            QMessageBox.critical(self, "Error", f"Could not read the catalog: {error}")
+            return
+        if not duplicates:
+            QMessageBox.information(self, "Duplicate Levels", "No duplicate levels were found in the catalog")
+            return
+        QMessageBox.information(self, "Duplicate Levels",
+                                "\n\n".join("\n".join(filePaths) for filePaths in duplicates.values()))
+
+    def get_level_catalog(self) -> PacmanLevelCatalog:
+        # ? The catalog file is only created once the user actually needs it
+        if self.internalLevelCatalog is None:
+            self.internalLevelCatalog = PacmanLevelCatalog()
+        return self.internalLevelCatalog
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        if self.internalLevelCatalog is not None:
+            self.internalLevelCatalog.close()
+            self.internalLevelCatalog = None
+        super().closeEvent(event)
+
     def __configuring_vBoxWithButtons(self) -> None:
         # Increase the spacing between elements
         self.vBoxForButtonPlacement.setSpacing(20)
@@ -1,10 +1,129 @@
+import argparse
+import sqlite3
 import sys
 
-from PyQt5.QtWidgets import QApplication
-from Views.GridCreationToolView import PacmanGridCreationToolView
+from Models.PacmanGrid import PacmanGrid
+from Models.PacmanLevelCatalog import PacmanLevelCatalog, DEFAULT_CATALOG_LOCATION
+
+
+def catalog_main(arguments: list[str]) -> int:
+    # ? Command line access to the level catalog, it does not need Qt so it is handled before the view is created
+    parser = argparse.ArgumentParser(prog="main.py catalog",
+                                     description="Index and query exported Pacman levels")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_LOCATION, help="SQLite file holding the catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    indexParser = subparsers.add_parser("index", help="Index the exported .txt files within a folder")
+    indexParser.add_argument("directory")
+    queryParser = subparsers.add_parser("query", help="List the levels matching every condition")
+    queryParser.add_argument("--where", action="append", default=[],
+                             help="Condition such as normalPowerUpCount>20 or pinkGhostRow=7")
+    subparsers.add_parser("duplicates", help="List the levels exported to more than one file")
+    parsedArguments = parser.parse_args(arguments)
+
+    try:
+        catalog: PacmanLevelCatalog = PacmanLevelCatalog(parsedArguments.catalog)
+    except (sqlite3.Error, OSError) as error:
+        parser.error(f"Could not open the catalog {parsedArguments.catalog}: {error}")
+    try:
+        if parsedArguments.command == "index":
+            summary: dict[str, int] = catalog.indexDirectory(parsedArguments.directory)
+            print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+        elif parsedArguments.command == "query":
+            try:
+                conditions = [catalog.parseCondition(condition) for condition in parsedArguments.where]
+                levels: list[dict] = catalog.queryLevels(conditions)
+            except ValueError as error:
+                parser.error(str(error))
+            for level in levels:
+                print(f"{level['gridHash']} normalPowerUps={level['normalPowerUpCount']} "
+                      f"eatOthersPowerUps={level['eatOthersPowerUpCount']} wallDensity={level['wallDensity']:.2f} "
+                      f"reachableCells={level['reachableCellCount']}")
+                for filePath in level['filePaths']:
+                    print(" " * 4 + filePath)
+        elif parsedArguments.command == "duplicates":
+            for gridHash, filePaths in catalog.findDuplicateLevels().items():
+                print(gridHash)
+                for filePath in filePaths:
+                    print(" " * 4 + filePath)
+    except (sqlite3.Error, OSError) as error:
+        parser.error(f"Catalog operation failed: {error}")
+    finally:
+        catalog.close()
+    return 0
+
+
+DELTA_PATCH_FORMAT: str = """patch format:
+  Each line holds one changed data word as "label[key], HEX value" or "label[key], DEC value".
+  The address of the word is the address of the label in the assembled program plus the offset given by the key:
+    pacmanEntityArray, <color>GhostOriginalLocation   offset 0
+    normalPowerUpsLocations[i], eatOthersPowerUpsLocations[i]   offset i
+    colorLocationArrayForRow[Fxy]   offset Fxy - F00 (the display address of the cell)
+    movementListValues[i]   offset i
+  Patches are only produced when both levels hold the same amount of each entity, otherwise the labels
+  sit at different addresses and a full export is needed."""
+
+
+def delta_main(arguments: list[str]) -> int:
+    # ? Command line access to the delta export, it prints only the words that changed between two exported files, or
+    # ? applies such a patch back onto an exported file to rebuild a full export
+    parser = argparse.ArgumentParser(prog="main.py delta",
+                                     description="Emit the data words that changed between two exported levels",
+                                     epilog=DELTA_PATCH_FORMAT,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("previous", help="Previously exported .txt file, or the base file when using --apply")
+    parser.add_argument("current", nargs="?", help="Newer exported .txt file")
+    parser.add_argument("--include-movement", action="store_true",
+                        help="Also compare the movement list, it is drawn at random every session so it is left out "
+                             "by default")
+    parser.add_argument("--apply", metavar="PATCH", help="Apply a patch onto the previous file instead of comparing")
+    parser.add_argument("--output", help="File to write the patch (or the full export with --apply) to instead of "
+                                         "the standard output")
+    parsedArguments = parser.parse_args(arguments)
+    if (parsedArguments.apply is None) == (parsedArguments.current is None):
+        parser.error("expected either two exported files, or one exported file and --apply PATCH")
+
+    grids: list[PacmanGrid] = []
+    for filePath in filter(None, (parsedArguments.previous, parsedArguments.current)):
+        grid: PacmanGrid = PacmanGrid()
+        try:
+            with open(filePath, 'r', encoding='utf-8') as fileToRead:
+                serializedGrid: str = fileToRead.read()
+        except OSError as error:
+            parser.error(str(error))
+        if not grid.loadFromSerializedString(serializedGrid):
+            parser.error(f"{filePath} is not an exported Pacman level")
+        grids.append(grid)
+
+    if parsedArguments.apply is not None:
+        try:
+            with open(parsedArguments.apply, 'r', encoding='utf-8') as fileToRead:
+                deltaPatch: str = fileToRead.read()
+        except OSError as error:
+            parser.error(str(error))
+        if not grids[0].applyDeltaPatch(deltaPatch):
+            parser.error(f"{parsedArguments.apply} is not a valid patch for {parsedArguments.previous}")
+        result: str = grids[0].__str__()
+    else:
+        try:
+            result = grids[1].computeDeltaPatch(grids[0], includeMovementWords=parsedArguments.include_movement)
+        except ValueError as error:
+            parser.error(str(error))
+    if parsedArguments.output:
+        with open(parsedArguments.output, 'w', encoding='utf-8') as fileToWrite:
+            fileToWrite.write(result)
+    elif result:
+        print(result)
+    return 0
 
 
 def main()-> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "catalog":
+        sys.exit(catalog_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "delta":
+        sys.exit(delta_main(sys.argv[2:]))
+
+    from PyQt5.QtWidgets import QApplication
+    from Views.GridCreationToolView import PacmanGridCreationToolView
     application: QApplication = QApplication([])
     window: PacmanGridCreationToolView = PacmanGridCreationToolView()
     window.show()